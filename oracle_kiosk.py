@@ -2,150 +2,648 @@
 # --------------------------------------------------
 # Update: Added clear form reset button.
 
+from __future__ import annotations
+
+import base64
+import concurrent.futures
+import hashlib
+import html
+import json
 import os
+import re
+import sqlite3
+import threading
 import time
-import requests
+from functools import lru_cache
+from typing import Iterator
+
 import streamlit as st
-from dotenv import load_dotenv
 
-# Optional .env loader
-load_dotenv()
+from prompts import SYSTEM_PROMPTS, USER_TEMPLATE
+
+@st.cache_resource(show_spinner=False)
+def get_session() -> httpx.Client:
+    # One pooled HTTP/2 client per process: a single TLS handshake is
+    # amortized across every OpenAI / ElevenLabs call, and concurrent
+    # requests multiplex over one connection instead of opening sockets.
+    # Imported here (not at module top) to keep it off the cold-start path;
+    # the module cache makes later lookups free.
+    import httpx
+
+    client = httpx.Client(
+        http2=True,
+        # Generous read window for long generations, but fail fast when a
+        # connection can't even be established.
+        timeout=httpx.Timeout(120.0, connect=5.0),
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+    )
+
+    def _keepalive() -> None:
+        # The kiosk idles between participants; a cheap ping every minute
+        # keeps one warm socket per host so the first visible request
+        # doesn't pay a fresh TLS handshake.
+        while True:
+            time.sleep(60)
+            for url in ("https://api.openai.com/v1/models", "https://api.elevenlabs.io/v1/voices"):
+                try:
+                    client.head(url, timeout=5)
+                except Exception:
+                    pass
+
+    threading.Thread(target=_keepalive, daemon=True).start()
+    return client
+
+@st.cache_resource(show_spinner=False)
+def get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    return concurrent.futures.ThreadPoolExecutor(max_workers=4)
+
+@st.cache_resource(show_spinner=False)
+def get_tts_executor() -> concurrent.futures.ThreadPoolExecutor:
+    # Separate pool for the per-sentence TTS fan-out. A prefetch task on
+    # get_executor() blocks on its sentence futures, so scheduling those on
+    # the same bounded pool can deadlock it once every worker holds a
+    # blocked outer task. Workers here only do network I/O, so the pool can
+    # afford to be wider.
+    return concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
+# Transient statuses worth retrying: rate limits and upstream hiccups.
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Bounds in-flight OpenAI requests (scan + batch + prefetch threads) so a
+# burst stays under the per-minute rate caps instead of tripping 429s.
+_OPENAI_SEM = threading.BoundedSemaphore(int(os.getenv("OPENAI_CONCURRENCY", "5")))
+
+def _send_with_retry(req: httpx.Request, stream: bool = False, retries: int = 3, backoff: float = 0.3) -> httpx.Response:
+    # Equivalent of urllib3's Retry(total=3, backoff_factor=0.3,
+    # status_forcelist=...) for the httpx client: exponential backoff on
+    # connection failures, 429s and 5xx responses.
+    import httpx
+
+    client = get_session()
+    limiter = _OPENAI_SEM if req.url.host == "api.openai.com" else None
+    for attempt in range(retries + 1):
+        try:
+            if limiter is not None:
+                with limiter:
+                    resp = client.send(req, stream=stream)
+            else:
+                resp = client.send(req, stream=stream)
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+            continue
+        if resp.status_code in _RETRY_STATUSES and attempt < retries:
+            # 429s usually say how long to hold off; believe them.
+            retry_after = resp.headers.get("retry-after")
+            resp.close()
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = backoff * (2 ** attempt)
+            time.sleep(delay)
+            continue
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError:
+            # Close before raising: a streamed error response that is never
+            # read would otherwise hold its pooled connection forever.
+            resp.close()
+            raise
+        return resp
+    raise RuntimeError("unreachable")
+
+# Sentence boundary used to chunk a reading for incremental TTS.
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Content-addressed MP3 cache; survives process restarts and Clear Form,
+# unlike st.session_state / st.cache_data. A single SQLite file instead of
+# loose MP3s: indexed O(1) lookups, one artifact to deploy or wipe, and a
+# TTL sweeper so a festival weekend can't grow an unbounded pile.
+_TTS_DB_LOCK = threading.Lock()
+
+@st.cache_resource(show_spinner=False)
+def get_tts_cache() -> sqlite3.Connection:
+    conn = sqlite3.connect("tts_cache.db", check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS cache("
+        "hash TEXT PRIMARY KEY, mp3 BLOB, voice_id TEXT, "
+        "created_at REAL, hit_count INTEGER DEFAULT 0)"
+    )
+    conn.commit()
+
+    def _sweep() -> None:
+        # Hourly TTL pruning; compact once a week.
+        ticks = 0
+        while True:
+            time.sleep(3600)
+            ticks += 1
+            try:
+                with _TTS_DB_LOCK:
+                    conn.execute("DELETE FROM cache WHERE created_at < ?", (time.time() - 7 * 86400,))
+                    conn.commit()
+                    if ticks % 168 == 0:
+                        conn.execute("VACUUM")
+            except Exception:
+                pass
+
+    threading.Thread(target=_sweep, daemon=True).start()
+    return conn
+
+def _tts_cache_get(key: str) -> bytes | None:
+    conn = get_tts_cache()
+    with _TTS_DB_LOCK:
+        row = conn.execute("SELECT mp3 FROM cache WHERE hash = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE cache SET hit_count = hit_count + 1 WHERE hash = ?", (key,))
+        conn.commit()
+        return row[0]
+
+def _tts_cache_put(key: str, audio: bytes, voice_id: str) -> None:
+    conn = get_tts_cache()
+    with _TTS_DB_LOCK:
+        conn.execute(
+            "INSERT OR REPLACE INTO cache(hash, mp3, voice_id, created_at, hit_count) VALUES(?, ?, ?, ?, 0)",
+            (key, audio, voice_id, time.time()),
+        )
+        conn.commit()
+
+# Part of the audio cache key: changing these must miss the cache.
+VOICE_SETTINGS = {"stability": 0.5, "similarity_boost": 0.75}
 
 # --- Configuration ---
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or st.secrets.get("OPENAI_API_KEY", "")
-ELEVEN_API_KEY = os.getenv("ELEVENLABS_API_KEY") or st.secrets.get("ELEVENLABS_API_KEY", "")
-ELEVEN_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID") or st.secrets.get("ELEVENLABS_VOICE_ID", "")
-OPENAI_MODEL = os.getenv("OPENAI_MODEL") or st.secrets.get("OPENAI_MODEL", "gpt-4o-mini")
-
-# --- Prompts (short single version for all modes) ---
-SYSTEM_PROMPT_GROWNUP = (
-    "You are an omniscient, cybernetic oracle.\n"
-    "You don’t predict the future magically, but by running vast probability models on human patterns.\n"
-    "Your voice blends clinical precision + poetic insight.\n"
-    "Avoid astrological or mystical references.\n\n"
-    "Start with: Subject: {Name}. {Occupation}. {Detail}. Identity verified. Neural scan complete. Predictive model activated.\n\n"
-    "Write one concise, vivid paragraph synthesizing patterns and probabilities (around 5–7 sentences).\n"
-    "End with: Action for Today: [one directive].\nFinal Joke: [a witty personal one-liner].\n"
-)
-
-SYSTEM_PROMPT_KIDS = (
-    "You are Grimey the Brain-Scanning Supercomputer for kids. Be funny, kind, and wild.\n\n"
-    "Start with: BEEP BOOP! {Name}. {Detail}. [Funny brain joke — e.g., ‘your brain smells like pancakes and meteors’ or ‘tiny man inside yelling something silly’].\n\n"
-    "Then write 3–5 playful, imaginative lines that pretend to read their brain (silly, animal, food, or magic themes).\n\n"
-    "End with: Do This Today: [one simple good thing].\nJoke: [a clean, hilarious one-liner just for them].\n"
-)
-
-SYSTEM_PROMPT_TEEN = (
-    "🧠 Teen Mode Oracle Prompt (Gen Z / Alpha Style)\n\n"
-    "Tone: lowercase, chaotic, sincere but ironic, meme energy.\nThink ‘bestie who hacked the simulation’.\nUse max 2 slang or emojis (💀, 😭, bsffr, delulu, rizz, iykyk).\nKeep lines short, like chat fragments.\n\n"
-    "Start with: Subject: {Name}. {Occupation}. {Detail}. Identity verified. Neural scan complete. Predictive model activated.\n\n"
-    "Then one tight block (~6 lines) mixing prediction, self-awareness, and humor.\n\n"
-    "End with: takeaway: [direct advice in teen slang].\njoke: [personal meme-style one-liner].\n"
-)
-
-USER_INSTRUCTION = (
-    "Return ONE short reading.\n\n"
-    "Name: {name}\nOccupation: {occupation}\nDetail: {detail}\nBirthday: {birthday}\n"
-)
-
-def generate_oracle_text(name: str, occupation: str, detail: str, birthday: str, model: str, mode: str) -> str:
+@st.cache_resource(show_spinner=False)
+def load_config() -> dict:
+    # Streamlit re-executes this script on every rerun; the resource cache
+    # makes .env loading and env/secrets parsing a once-per-process cost.
+    # dotenv only matters (and only loads) when a .env file is present.
+    if os.path.exists(".env"):
+        from dotenv import load_dotenv
+
+        load_dotenv()
+    return {
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY") or st.secrets.get("OPENAI_API_KEY", ""),
+        "ELEVEN_API_KEY": os.getenv("ELEVENLABS_API_KEY") or st.secrets.get("ELEVENLABS_API_KEY", ""),
+        "ELEVEN_VOICE_ID": os.getenv("ELEVENLABS_VOICE_ID") or st.secrets.get("ELEVENLABS_VOICE_ID", ""),
+        "OPENAI_MODEL": os.getenv("OPENAI_MODEL") or st.secrets.get("OPENAI_MODEL", "gpt-4o-mini"),
+    }
+
+_config = load_config()
+OPENAI_API_KEY = _config["OPENAI_API_KEY"]
+ELEVEN_API_KEY = _config["ELEVEN_API_KEY"]
+ELEVEN_VOICE_ID = _config["ELEVEN_VOICE_ID"]
+OPENAI_MODEL = _config["OPENAI_MODEL"]
+
+# (temperature, max_tokens) per mode. Budgets are sized to each mode's
+# template — generated tokens dominate chat-completion latency, so
+# over-allocating max_tokens only inflates OpenAI's decode scheduling.
+MODE_PARAMS = {"Grown-Up": (0.8, 320), "Kid-Friendly": (0.95, 220), "Teen": (0.95, 260)}
+
+# The shortest format doesn't benefit from a bigger model: even if an
+# operator points OPENAI_MODEL at a large model for the wordier personas,
+# Kid-Friendly stays on the distilled mini model (2-5x faster TTFT, ~10x
+# cheaper), with a one-shot example in its prompt holding the format.
+MODE_MODEL_OVERRIDES = {"Kid-Friendly": "gpt-4o-mini"}
+
+# Input-token latency scales with prompt length, and the prompt-cache win
+# depends on the dynamic suffix staying small — so free-text detail gets a
+# hard token budget.
+DETAIL_TOKEN_BUDGET = 256
+
+@st.cache_resource(show_spinner=False)
+def get_encoder():
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(OPENAI_MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+def _truncate_detail(detail: str) -> str:
+    tokens = get_encoder().encode(detail)
+    if len(tokens) <= DETAIL_TOKEN_BUDGET:
+        return detail
+    return get_encoder().decode(tokens[:DETAIL_TOKEN_BUDGET])
+
+# Partial evaluation: everything in the payload except the user message,
+# model and stream flag is fixed per mode, so build those skeletons (and
+# the system-message dicts) once at import instead of per request. The
+# prompt_cache_key groups server-side prompt-cache entries per persona.
+_PAYLOAD_BASE = {
+    mode: {
+        "messages": [{"role": "system", "content": SYSTEM_PROMPTS[mode]}],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "prompt_cache_key": f"oracle-{mode}",
+    }
+    for mode, (temperature, max_tokens) in MODE_PARAMS.items()
+}
+
+@lru_cache(maxsize=256)
+def _format_user(name: str, occupation: str, detail: str, birthday: str) -> str:
+    # Repeat guests (and Regenerate) hit a dict probe instead of re-running
+    # tokenization and template substitution.
+    return USER_TEMPLATE.substitute(
+        name=name or "not provided",
+        occupation=occupation or "not provided",
+        detail=_truncate_detail(detail) if detail else "not provided",
+        birthday=birthday or "not provided",
+    )
+
+def _chat_payload(name: str, occupation: str, detail: str, birthday: str, model: str, mode: str, stream: bool = True) -> dict:
+    # Unknown modes fall back to Teen, matching the old if/elif chain.
+    base = _PAYLOAD_BASE.get(mode, _PAYLOAD_BASE["Teen"])
+    user_message = {"role": "user", "content": _format_user(name, occupation, detail, birthday)}
+    return {
+        **base,
+        "model": MODE_MODEL_OVERRIDES.get(mode, model),
+        "messages": [base["messages"][0], user_message],
+        "stream": stream,
+    }
+
+def _open_oracle_stream(name: str, occupation: str, detail: str, birthday: str, model: str, mode: str) -> httpx.Response:
+    import orjson
+
     endpoint = "https://api.openai.com/v1/chat/completions"
     headers = {"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"}
-    if mode == "Grown-Up":
-        system_prompt = SYSTEM_PROMPT_GROWNUP
-    elif mode == "Kid-Friendly":
-        system_prompt = SYSTEM_PROMPT_KIDS
-    else:
-        system_prompt = SYSTEM_PROMPT_TEEN
+    payload = _chat_payload(name, occupation, detail, birthday, model, mode)
+    req = get_session().build_request("POST", endpoint, headers=headers, content=orjson.dumps(payload), timeout=60)
+    return _send_with_retry(req, stream=True)
+
+def _iter_oracle_tokens(resp: httpx.Response) -> Iterator[str]:
+    # SSE stream: each "data: {...}" line carries one token delta. orjson
+    # keeps the per-delta parse cheap — this runs hundreds of times per
+    # reading while the UI is repainting between tokens.
+    import orjson
+
+    try:
+        for line in resp.iter_lines():
+            if not line.startswith("data: "):
+                continue
+            data = line[len("data: "):]
+            if data == "[DONE]":
+                break
+            token = orjson.loads(data)["choices"][0]["delta"].get("content")
+            if token:
+                yield token
+    finally:
+        resp.close()
 
+@st.cache_data(ttl=86400, max_entries=512, show_spinner=False)
+def _generate_oracle_text_cached(name: str, occupation: str, detail: str, birthday: str, model: str, mode: str, nonce: int = 0) -> str:
+    # Identical form inputs replay from cache with zero network time; the
+    # nonce only changes when the user explicitly asks to regenerate.
+    # The scan-theater lines mark real milestones — request sent, stream
+    # open, generation finished — rather than fixed sleeps.
+    st.write("Uploading neural data…")
+    resp = _open_oracle_stream(name, occupation, detail, birthday, model, mode)
+    st.write("Pattern graph building…")
+    text = st.write_stream(_iter_oracle_tokens(resp))
+    st.write("Probability mesh converged.")
+    return text.strip()
+
+def elevenlabs_tts(text: str, voice_id: str, api_key: str, model_id: str = "eleven_turbo_v2_5") -> bytes:
+    key = hashlib.sha256(
+        f"{voice_id}|{model_id}|{VOICE_SETTINGS['stability']}|{VOICE_SETTINGS['similarity_boost']}|{text}".encode()
+    ).hexdigest()
+    cached = _tts_cache_get(key)
+    if cached is not None:
+        return cached
+    # Streaming endpoint: bytes arrive while ElevenLabs is still synthesizing,
+    # instead of blocking until the whole MP3 is rendered server-side.
+    # optimize_streaming_latency=3 trades a sliver of quality for much
+    # earlier first bytes; the explicit output_format keeps the cached
+    # files' bitrate stable.
+    url = (
+        f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream"
+        "?optimize_streaming_latency=3&output_format=mp3_44100_128"
+    )
+    headers = {"xi-api-key": api_key, "accept": "audio/mpeg", "Content-Type": "application/json"}
+    import orjson
+
+    payload = {"text": text, "model_id": model_id, "voice_settings": VOICE_SETTINGS}
+    req = get_session().build_request("POST", url, headers=headers, content=orjson.dumps(payload), timeout=120)
+    r = _send_with_retry(req, stream=True)
+    try:
+        buf = bytearray()
+        for chunk in r.iter_bytes(chunk_size=4096):
+            buf.extend(chunk)
+    finally:
+        r.close()
+    audio = bytes(buf)
+    _tts_cache_put(key, audio, voice_id)
+    return audio
+
+def synthesize_reading(text: str, voice_id: str, api_key: str, model_id: str = "eleven_turbo_v2_5") -> bytes:
+    # Synthesize sentence chunks in parallel so later sentences render while
+    # earlier ones are still downloading, then stitch the MP3 segments back
+    # together in order.
+    sentences = [s for s in _SENTENCE_RE.split(text) if s.strip()]
+    if len(sentences) <= 1:
+        return elevenlabs_tts(text, voice_id, api_key, model_id)
+    futures = [get_tts_executor().submit(elevenlabs_tts, s, voice_id, api_key, model_id) for s in sentences]
+    return b"".join(f.result() for f in futures)
+
+@st.cache_data(ttl=7 * 86400, max_entries=64, show_spinner=False)
+def _synthesize_reading_cached(text: str, voice_id: str, model_id: str) -> bytes:
+    # Approving the same text twice replays the cached audio instantly.
+    return synthesize_reading(text, voice_id, ELEVEN_API_KEY, model_id)
+
+@st.cache_resource(show_spinner=False)
+def prewarm_tts() -> None:
+    # The first synthesis against a cold voice pays a one-time model-load
+    # cost; spend it on a throwaway dot at startup instead of in front of
+    # the first participant. Runs once per process, off-thread.
+    if not (ELEVEN_API_KEY and ELEVEN_VOICE_ID):
+        return
+
+    def _warm() -> None:
+        try:
+            elevenlabs_tts(".", ELEVEN_VOICE_ID, ELEVEN_API_KEY)
+        except Exception:
+            pass
+
+    threading.Thread(target=_warm, daemon=True).start()
+
+def openai_tts(text: str) -> bytes:
+    # One round-trip voice: gpt-4o-audio-preview reads the approved text
+    # aloud directly, skipping the separate ElevenLabs trip (its queueing,
+    # the text upload and the MP3 download) on an already-warm connection.
+    import orjson
+
+    endpoint = "https://api.openai.com/v1/chat/completions"
+    headers = {"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"}
     payload = {
-        "model": model,
+        "model": "gpt-4o-audio-preview",
+        "modalities": ["text", "audio"],
+        "audio": {"voice": "alloy", "format": "mp3"},
         "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": USER_INSTRUCTION.format(
-                name=name or "not provided",
-                occupation=occupation or "not provided",
-                detail=detail or "not provided",
-                birthday=birthday or "not provided",
-            )},
+            {"role": "system", "content": "Read the user's text aloud exactly as written, with a calm, oracular delivery."},
+            {"role": "user", "content": text},
         ],
-        "temperature": 0.95 if mode in ["Kid-Friendly", "Teen"] else 0.8,
-        "max_tokens": 500,
     }
-    resp = requests.post(endpoint, headers=headers, json=payload, timeout=60)
+    req = get_session().build_request("POST", endpoint, headers=headers, content=orjson.dumps(payload), timeout=120)
+    resp = _send_with_retry(req)
+    data = orjson.loads(resp.content)
+    return base64.b64decode(data["choices"][0]["message"]["audio"]["data"])
+
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def _openai_tts_cached(text: str) -> bytes:
+    return openai_tts(text)
+
+# --- Offline batch generation (OpenAI Batch API, 50% token cost) ---
+# For non-interactive work — pre-generating a guest list, QA across modes —
+# the sync endpoint is wasted money; the 24h batch window halves it.
+
+def submit_batch(rows: list[dict]) -> str:
+    # rows: dicts with name / occupation / detail / birthday / mode keys.
+    import orjson
+
+    lines = []
+    for i, row in enumerate(rows):
+        body = _chat_payload(
+            row.get("name", ""), row.get("occupation", ""), row.get("detail", ""),
+            row.get("birthday", ""), OPENAI_MODEL, row.get("mode", "Grown-Up"),
+            stream=False,
+        )
+        lines.append(orjson.dumps(
+            {"custom_id": f"oracle-{i}", "method": "POST", "url": "/v1/chat/completions", "body": body}
+        ))
+    headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
+    client = get_session()
+    upload = client.post(
+        "https://api.openai.com/v1/files",
+        headers=headers,
+        data={"purpose": "batch"},
+        files={"file": ("oracle_batch.jsonl", b"\n".join(lines))},
+        timeout=120,
+    )
+    upload.raise_for_status()
+    created = client.post(
+        "https://api.openai.com/v1/batches",
+        headers={**headers, "Content-Type": "application/json"},
+        content=orjson.dumps({
+            "input_file_id": upload.json()["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h",
+        }),
+        timeout=60,
+    )
+    created.raise_for_status()
+    return created.json()["id"]
+
+def get_batch(batch_id: str) -> dict:
+    headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
+    resp = get_session().get(f"https://api.openai.com/v1/batches/{batch_id}", headers=headers, timeout=30)
     resp.raise_for_status()
-    data = resp.json()
-    return data["choices"][0]["message"]["content"].strip()
+    return resp.json()
 
-def elevenlabs_tts(text: str, voice_id: str, api_key: str) -> bytes:
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-    headers = {"xi-api-key": api_key, "accept": "audio/mpeg", "Content-Type": "application/json"}
-    payload = {"text": text, "model_id": "eleven_multilingual_v2", "voice_settings": {"stability": 0.5, "similarity_boost": 0.75}}
-    r = requests.post(url, headers=headers, json=payload, timeout=120)
-    r.raise_for_status()
-    return r.content
+def fetch_batch_results(batch_id: str) -> dict[str, str]:
+    # custom_id -> generated reading, for a completed batch.
+    import orjson
+
+    batch = get_batch(batch_id)
+    headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
+    resp = get_session().get(
+        f"https://api.openai.com/v1/files/{batch['output_file_id']}/content",
+        headers=headers, timeout=120,
+    )
+    resp.raise_for_status()
+    results = {}
+    for line in resp.content.splitlines():
+        if not line.strip():
+            continue
+        row = orjson.loads(line)
+        body = row["response"]["body"]
+        results[row["custom_id"]] = body["choices"][0]["message"]["content"].strip()
+    return results
 
 st.set_page_config(page_title="Grimey Super Intelligence", page_icon="🧠", layout="wide")
 st.title("🧠 Grimey Super Intelligence — Brain Scan Interface")
 
+prewarm_tts()
+
+with st.sidebar:
+    # Turbo/flash synthesize noticeably faster than multilingual at
+    # near-identical quality for English monologue.
+    tts_model = st.selectbox(
+        "TTS model",
+        ["eleven_turbo_v2_5", "eleven_flash_v2_5", "eleven_multilingual_v2"],
+    )
+    # Trades the custom ElevenLabs voice for one fewer network round-trip.
+    use_openai_audio = st.toggle("Use OpenAI voice (single round-trip)")
+    # Synthesizes in the background while the participant is still reading,
+    # so Generate Voice is near-instant. Costs TTS even if never played.
+    prefetch_audio = st.toggle("Prefetch voice after scan")
+
+    with st.expander("Batch pre-generation (50% cost)"):
+        batch_csv = st.file_uploader("Guest list CSV (name,occupation,detail,birthday,mode)", type="csv")
+        if batch_csv is not None and st.button("Submit batch", use_container_width=True):
+            import csv
+            import io
+
+            try:
+                rows = list(csv.DictReader(io.TextIOWrapper(batch_csv, encoding="utf-8")))
+                st.session_state["batch_id"] = submit_batch(rows)
+            except Exception as e:
+                # A malformed CSV or API rejection shouldn't crash the
+                # sidebar mid-event.
+                st.exception(e)
+        if st.session_state.get("batch_id"):
+            st.caption(f"Batch: {st.session_state['batch_id']}")
+            if st.button("Check status", use_container_width=True):
+                try:
+                    batch = get_batch(st.session_state["batch_id"])
+                    st.write(batch.get("status"))
+                    if batch.get("status") == "completed":
+                        results = fetch_batch_results(st.session_state["batch_id"])
+                        st.download_button(
+                            "Download readings (JSON)",
+                            data=json.dumps(results, ensure_ascii=False, indent=2),
+                            file_name="oracle_batch_results.json",
+                            mime="application/json",
+                            use_container_width=True,
+                        )
+                except Exception as e:
+                    # e.g. an expired or deleted batch ID.
+                    st.exception(e)
+
 # --- Clear Form Button ---
 if st.button("🔄 Clear Form / Reset Page", use_container_width=True):
-    for key in list(st.session_state.keys()):
-        del st.session_state[key]
-    st.experimental_rerun()
+    # The button click already triggers a rerun; clear() beats the
+    # per-key delete loop and the deprecated st.experimental_rerun().
+    st.session_state.clear()
 
 # --- Participant Form ---
 st.subheader("Participant Form")
 with st.form("oracle_form", clear_on_submit=False):
     name = st.text_input("Name", max_chars=80)
     occupation = st.text_input("Occupation", max_chars=120)
-    detail = st.text_area("Detail (interests, fears, a recent event, etc.)", height=100)
+    # max_chars gives the participant a live counter; ~1000 chars keeps
+    # most inputs inside the token budget before truncation kicks in.
+    detail = st.text_area("Detail (interests, fears, a recent event, etc.)", height=100, max_chars=1000)
     birthday = st.text_input("Birthday (optional — free text, e.g., 'July 12' or 'not provided')", value="not provided")
     mode = st.radio("Output Style", options=["Grown-Up", "Kid-Friendly", "Teen"], horizontal=True)
     submitted = st.form_submit_button("Begin Scan →", use_container_width=True)
 
 if "oracle_text" not in st.session_state:
     st.session_state["oracle_text"] = ""
+if "oracle_html" not in st.session_state:
+    st.session_state["oracle_html"] = ""
 if "audio_bytes" not in st.session_state:
     st.session_state["audio_bytes"] = None
 
+def _reading_html(text: str) -> str:
+    # Escape before the <br> join: the reading is model output headed into
+    # an unsafe_allow_html block, so it must never carry live markup.
+    return html.escape(text).replace("\n", "<br>")
+
+def _warm_elevenlabs() -> None:
+    # Touch the ElevenLabs host so DNS + TLS are already negotiated by the
+    # time the reading is approved for synthesis.
+    try:
+        get_session().head("https://api.elevenlabs.io/v1/voices", timeout=5)
+    except Exception:
+        pass
+
+def run_scan(name: str, occupation: str, detail: str, birthday: str, mode: str) -> bool:
+    with st.status("Neural scan in progress…", expanded=True) as status:
+        try:
+            # Overlaps with text generation on the worker pool.
+            get_executor().submit(_warm_elevenlabs)
+            text = _generate_oracle_text_cached(
+                name, occupation, detail, birthday, OPENAI_MODEL, mode,
+                st.session_state.get("gen_nonce", 0),
+            )
+            st.session_state["oracle_text"] = text
+            # Render the HTML once here rather than on every rerun.
+            st.session_state["oracle_html"] = _reading_html(text)
+            # The edit box is a live widget by the time Regenerate calls
+            # this, and widget keys can't be written after instantiation —
+            # flag the sync and let output_panel apply it at its top.
+            st.session_state["sync_edit"] = True
+            st.session_state["audio_bytes"] = None
+            if prefetch_audio and ELEVEN_API_KEY and ELEVEN_VOICE_ID:
+                # Speculative synthesis overlaps the ~10s the participant
+                # spends reading; the disk cache absorbs double-billing.
+                st.session_state["audio_future"] = (
+                    text,
+                    tts_model,
+                    get_executor().submit(synthesize_reading, text, ELEVEN_VOICE_ID, ELEVEN_API_KEY, tts_model),
+                )
+            st.success("Scan complete")
+            return True
+        except Exception as e:
+            status.update(label="Scan failed", state="error")
+            st.exception(e)
+            return False
+
 if submitted:
     if not OPENAI_API_KEY:
         st.error("Missing OpenAI API Key")
     else:
-        with st.status("Neural scan in progress…", expanded=True) as status:
-            st.write("Uploading neural data…")
-            time.sleep(0.6)
-            st.write("Pattern graph building…")
-            time.sleep(0.6)
-            st.write("Probability mesh converging…")
-            try:
-                text = generate_oracle_text(name, occupation, detail, birthday, OPENAI_MODEL, mode)
-                st.session_state["oracle_text"] = text
+        st.session_state["last_inputs"] = (name, occupation, detail, birthday, mode)
+        run_scan(name, occupation, detail, birthday, mode)
+
+@st.fragment
+def output_panel() -> None:
+    # Scoped rerun: Regenerate / Generate Voice / Download only re-execute
+    # this panel rather than the whole script (form, prompts, config).
+    if st.session_state.pop("sync_edit", False):
+        # Applied here, before the edit text_area instantiates, so both the
+        # initial submit and a fragment rerun after Regenerate pick up the
+        # fresh reading.
+        st.session_state["oracle_text_edit"] = st.session_state["oracle_text"]
+    if st.session_state["oracle_text"]:
+        st.markdown(
+            f"<div style='font-size:1.25rem; line-height:1.6'>{st.session_state['oracle_html']}</div>",
+            unsafe_allow_html=True,
+        )
+        with st.form("edit_form"):
+            # Inside a form so typing doesn't rerun the script per
+            # keystroke; state syncs only when Save is pressed.
+            st.text_area("Oracle Text (review/edit before voice)", height=300, key="oracle_text_edit")
+            if st.form_submit_button("Save edits", use_container_width=True):
+                edited = st.session_state["oracle_text_edit"].strip()
+                st.session_state["oracle_text"] = edited
+                st.session_state["oracle_html"] = _reading_html(edited)
                 st.session_state["audio_bytes"] = None
-                st.success("Scan complete")
+                # Redraw the panel so the rendered reading above updates.
+                st.rerun(scope="fragment")
+        if st.button("🔁 Regenerate", use_container_width=True) and st.session_state.get("last_inputs"):
+            # Bumping the nonce forces a fresh generation for the same inputs.
+            st.session_state["gen_nonce"] = st.session_state.get("gen_nonce", 0) + 1
+            if run_scan(*st.session_state["last_inputs"]):
+                # The reading and edit box above already rendered with the
+                # old text this run; redraw the panel, same as Save edits.
+                st.rerun(scope="fragment")
+        if st.button("Generate Voice", use_container_width=True):
+            try:
+                prefetched = st.session_state.pop("audio_future", None)
+                if use_openai_audio:
+                    audio = _openai_tts_cached(st.session_state["oracle_text"])
+                elif prefetched is not None and prefetched[:2] == (st.session_state["oracle_text"], tts_model):
+                    # Speculative synthesis kicked off after the scan;
+                    # usually already done by the time this is clicked.
+                    # Both the text and the sidebar TTS model must still
+                    # match what the future was synthesized with.
+                    audio = prefetched[2].result()
+                else:
+                    audio = _synthesize_reading_cached(st.session_state["oracle_text"], ELEVEN_VOICE_ID, tts_model)
+                st.session_state["audio_bytes"] = audio
             except Exception as e:
-                status.update(label="Scan failed", state="error")
                 st.exception(e)
 
-if st.session_state["oracle_text"]:
-    st.markdown(
-        f"<div style='font-size:1.25rem; line-height:1.6'>{st.session_state['oracle_text'].replace('\n','<br>')}</div>",
-        unsafe_allow_html=True,
-    )
-    if st.button("Generate Voice", use_container_width=True):
-        try:
-            audio = elevenlabs_tts(st.session_state["oracle_text"], ELEVEN_VOICE_ID, ELEVEN_API_KEY)
-            st.session_state["audio_bytes"] = audio
-        except Exception as e:
-            st.exception(e)
+    if st.session_state.get("audio_bytes"):
+        st.audio(st.session_state["audio_bytes"], format="audio/mp3")
+        st.download_button(
+            label="Download MP3",
+            data=st.session_state["audio_bytes"],
+            file_name=f"oracle_reading.mp3",
+            mime="audio/mpeg",
+            use_container_width=True,
+        )
 
-if st.session_state.get("audio_bytes"):
-    st.audio(st.session_state["audio_bytes"], format="audio/mp3")
-    st.download_button(
-        label="Download MP3",
-        data=st.session_state["audio_bytes"],
-        file_name=f"oracle_reading.mp3",
-        mime="audio/mpeg",
-        use_container_width=True,
-    )
\ No newline at end of file
+output_panel()
\ No newline at end of file
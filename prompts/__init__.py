@@ -0,0 +1,31 @@
+# Oracle Kiosk — prompt templates
+# Kept in a real package so Streamlit's per-rerun re-execution of the main
+# script doesn't re-parse these literals: imported modules load once per
+# process. The personas themselves live in the .md files next to this file
+# so they can be edited without touching code.
+#
+# NOTE: the system prompts are sent byte-identical on every request, which
+# makes them eligible for OpenAI's server-side prompt caching (lower TTFT).
+# Keep anything dynamic — names, dates, session IDs — out of them; the
+# per-participant fields all live in the tiny user message so the long
+# prefix stays stable. OpenAI only caches prefixes past ~1024 tokens, so
+# the win grows as these personas grow — don't shrink them for style.
+
+from pathlib import Path
+from string import Template
+
+_PROMPT_DIR = Path(__file__).parent
+
+# File stems map onto the form's "Output Style" values:
+# grown-up.md → "Grown-Up", kid-friendly.md → "Kid-Friendly", teen.md → "Teen".
+SYSTEM_PROMPTS = {
+    p.stem.title(): p.read_text(encoding="utf-8")
+    for p in sorted(_PROMPT_DIR.glob("*.md"))
+}
+
+# Pre-parsed once at import; Template.substitute skips the str.format
+# parser on every request.
+USER_TEMPLATE = Template(
+    "Return ONE short reading.\n\n"
+    "Name: $name\nOccupation: $occupation\nDetail: $detail\nBirthday: $birthday\n"
+)